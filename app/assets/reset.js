@@ -0,0 +1,11 @@
+/* Resets for the input boxes, shared by every page. Defined once here so
+ * the clientside callbacks don't each carry their own inline copy. */
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    reset: {
+        blank: () => "",
+        one: () => 1,
+        edge: () => ["", "", 1],
+        pair: () => ["", ""],
+        network_edge: () => ["", "", 1, 0, 0]
+    }
+});
@@ -1,3 +1,5 @@
+import os
+
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_bootstrap_components as dbc
@@ -28,22 +30,28 @@ main_menu = html.Div([
     ])
 ])
 
+# Each route maps to its page layout, built once at import, and the reset
+# that brings the page's server-side state back in line with it (every
+# Cytoscape starts out empty, so the module caches have to as well).
+_pages = {
+    '/graphs': (nagui_g.layout, nagui_g.empty_graph),
+    '/digraphs': (nagui_d.layout, nagui_d.empty_digraph),
+    '/networks': (nagui_n.layout, nagui_n.empty_network),
+    '/': (main_menu, None),
+}
+
 @app.callback(Output('page-content', 'children'),
               [Input('url', 'pathname')])
 def display_page(pathname):
-    if pathname == '/graphs':
-        nagui_g.current_graph.clear()
-        return nagui_g.layout
-    elif pathname == '/digraphs':
-        nagui_d.current_digraph.clear()
-        return nagui_d.layout
-    elif pathname == '/networks':
-        nagui_n.current_network.clear()
-        return nagui_n.layout
-    elif pathname == '/':
-        return main_menu
-    else:
+    page = _pages.get(pathname)
+    if page is None:
         return '404'
+    layout, reset = page
+    if reset is not None:
+        reset()
+    return layout
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    # The Werkzeug debugger and reloader slow every callback down; only turn
+    # them on when explicitly asked for.
+    app.run_server(debug=os.environ.get('NAGUI_DEBUG') == '1')
@@ -11,3 +11,14 @@ app = dash.Dash(
 
 server = app.server
 app.config.suppress_callback_exceptions = True
+
+# Compressing the callback responses: the cytoscape elements payload is JSON
+# that gzips very well, so this cuts most of the wire bytes per interaction.
+# The app still works without flask_compress installed.
+try:
+    from flask_compress import Compress
+except ImportError:
+    pass
+else:
+    server.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+    Compress(server)
@@ -0,0 +1,185 @@
+"""
+In-process implementations of the digraph algorithms. They mirror what the
+D library computes, but run directly on the callback's graph: no file
+handshake, no subprocess spawn, and the heavy loops live in NumPy over a
+dense distance matrix instead of per-pair dictionary walks.
+"""
+
+import math
+import heapq
+
+import numpy as np
+import networkx as nx
+
+class NegativeCycleError(Exception):
+    """Raised when an algorithm runs into a negative cycle."""
+
+def adjacency_matrix(digraph):
+    """
+    Packs the digraph into a dense float distance matrix, with infinity for
+    missing arcs and zero on the diagonal.
+
+    Returns: (distances, vertices) where vertices fixes the row/column order.
+    """
+    vertices = list(digraph.nodes())
+    index = {vertex: i for i, vertex in enumerate(vertices)}
+    distances = np.full((len(vertices), len(vertices)), np.inf)
+    np.fill_diagonal(distances, 0.0)
+    for source, terminus, attributes in digraph.edges(data=True):
+        distances[index[source], index[terminus]] = attributes['weight']
+    return distances, vertices
+
+def all_pairs_dijkstra(digraph):
+    """
+    Finds a shortest path between every pair of vertices by running one
+    heap Dijkstra per root. Only valid without negative arcs; on sparse
+    digraphs it beats the cubic dense update.
+
+    Returns: the same (distances, previous, vertices) triple as floyd.
+    """
+    vertices = list(digraph.nodes())
+    index = {vertex: i for i, vertex in enumerate(vertices)}
+    count = len(vertices)
+    adjacency = [[] for _ in vertices]
+    for source, terminus, attributes in digraph.edges(data=True):
+        adjacency[index[source]].append((index[terminus], attributes['weight']))
+
+    distances = np.full((count, count), np.inf)
+    previous = np.broadcast_to(np.arange(count)[:, None], (count, count)).copy()
+    for root in range(count):
+        row = distances[root]
+        row[root] = 0.0
+        heap = [(0.0, root)]
+        while heap:
+            distance, vertex = heapq.heappop(heap)
+            if distance > row[vertex]:
+                continue
+            for terminus, weight in adjacency[vertex]:
+                through = distance + weight
+                if through < row[terminus]:
+                    row[terminus] = through
+                    previous[root, terminus] = vertex
+                    heapq.heappush(heap, (through, terminus))
+
+    return distances, previous, vertices
+
+def has_negative_arc(digraph):
+    """Returns True when any arc of the digraph has a negative weight."""
+    return any(attributes['weight'] < 0
+               for _, _, attributes in digraph.edges(data=True))
+
+def dijkstra_tree(digraph, start):
+    """
+    Finds a shortest-paths tree from start with a heap Dijkstra, walking
+    the digraph's adjacency directly. Only valid without negative arcs.
+
+    Returns: the tree as a new DiGraph whose arcs keep their original
+    weights, covering every vertex reachable from start.
+    """
+    distances = {start: 0}
+    previous = {}
+    visited = set()
+    heap = [(0, start)]
+    while heap:
+        distance, vertex = heapq.heappop(heap)
+        if vertex in visited:
+            continue
+        visited.add(vertex)
+        for terminus, attributes in digraph[vertex].items():
+            through = distance + attributes['weight']
+            if terminus not in visited and through < distances.get(terminus, math.inf):
+                distances[terminus] = through
+                previous[terminus] = vertex
+                heapq.heappush(heap, (through, terminus))
+
+    tree = nx.DiGraph()
+    tree.add_nodes_from(visited)
+    tree.add_edges_from(
+        (source, terminus, {'weight': digraph[source][terminus]['weight']})
+        for terminus, source in previous.items()
+    )
+    return tree
+
+def floyd(digraph):
+    """
+    Finds a shortest path between every pair of vertices using
+    Floyd-Warshall's algorithm. For each intermediate vertex k the whole
+    (i, j) plane is updated in one broadcast instead of two Python loops.
+    Sparse digraphs without negative arcs take the repeated-Dijkstra path
+    instead, which does asymptotically less work.
+
+    Returns: (distances, previous, vertices) where previous[i][j] is the
+    index of the vertex before j on the shortest path from i.
+    Throws: NegativeCycleError when a negative cycle is found.
+    """
+    count = digraph.number_of_nodes()
+    if (count > 1
+            and digraph.number_of_edges() < count * math.log2(count)
+            and all(attributes['weight'] >= 0
+                    for _, _, attributes in digraph.edges(data=True))):
+        return all_pairs_dijkstra(digraph)
+
+    distances, vertices = adjacency_matrix(digraph)
+    # previous[i][j] starts as i, like the D library's initial matrix.
+    previous = np.broadcast_to(np.arange(count)[:, None], (count, count)).copy()
+
+    for k in range(count):
+        through_k = distances[:, k, None] + distances[None, k, :]
+        improved = through_k < distances
+        # Masked in-place updates: no fresh (n, n) copies of the two
+        # matrices on every pivot.
+        distances[improved] = through_k[improved]
+        previous[improved] = np.broadcast_to(previous[k], (count, count))[improved]
+
+        # A shorter path from a vertex to itself means a negative cycle.
+        diagonal = np.diagonal(distances)
+        if (diagonal < 0).any():
+            culprit = int(np.argmax(diagonal < 0))
+            cycle = retrieve_cycle(previous, culprit, vertices)
+            raise NegativeCycleError('Negative cycle found: {}, with length {}.'.format(
+                cycle, int(diagonal[culprit])
+            ))
+
+    return distances, previous, vertices
+
+def retrieve_cycle(previous, culprit, vertices):
+    """Walks the previous matrix back from a vertex to name its cycle."""
+    cycle = [culprit]
+    vertex = previous[culprit, culprit]
+    while vertex != culprit and len(cycle) <= len(vertices):
+        cycle.append(vertex)
+        vertex = previous[culprit, vertex]
+    cycle.append(culprit)
+    return [vertices[v] for v in reversed(cycle)]
+
+def floyd_result(digraph):
+    """
+    Runs floyd and merges the shortest-path tree of every root into a single
+    digraph laid out the way the D library saves it: the tree rooted at the
+    i-th vertex carries i apostrophes on its vertex ids, and every vertex
+    keeps its plain name for the labels.
+
+    Returns: the merged trees as a new DiGraph.
+    Throws: NegativeCycleError when a negative cycle is found.
+    """
+    distances, previous, vertices = floyd(digraph)
+    count = len(vertices)
+    result = nx.DiGraph()
+    nodes = []
+    edges = []
+
+    for i in range(count):
+        suffix = "'" * i
+        nodes.append((vertices[i] + suffix, {'name': vertices[i]}))
+        for j in range(count):
+            if i != j and distances[i, j] != np.inf:
+                terminus = vertices[j]
+                source = vertices[previous[i, j]]
+                nodes.append((source + suffix, {'name': source}))
+                nodes.append((terminus + suffix, {'name': terminus}))
+                edges.append((source + suffix, terminus + suffix,
+                              {'weight': digraph[source][terminus]['weight']}))
+
+    result.add_nodes_from(nodes)
+    result.add_edges_from(edges)
+    return result
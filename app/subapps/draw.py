@@ -1,60 +1,145 @@
+import math
+
 import plotly.offline as py
 import plotly.graph_objs as go
 
 import numpy as np
 import networkx as nx
 
+# Last layout computed, keyed by vertex. Kept between calls so a single
+# added or removed vertex doesn't force a full re-layout of the drawing.
+_position_cache = {}
+
+def reset_layout():
+    """Drops the cached positions; the next update re-lays out everything."""
+    _position_cache.clear()
+
+def compute_layout(graph):
+    """
+    Returns positions for every vertex of the graph. The first call runs the
+    full Kamada-Kawai layout; afterwards known vertices keep their spot, new
+    ones start at the centroid of their placed neighbors (or on a spiral when
+    isolated) and get settled by a few spring iterations over their immediate
+    neighborhood.
+    """
+    if not _position_cache:
+        _position_cache.update(nx.layout.kamada_kawai_layout(graph, weight=None))
+        return _position_cache
+
+    for vertex in [v for v in _position_cache if v not in graph]:
+        del _position_cache[vertex]
+
+    new_vertices = [v for v in graph.nodes() if v not in _position_cache]
+    for vertex in new_vertices:
+        neighbors = [v for v in graph[vertex] if v in _position_cache]
+        if neighbors:
+            _position_cache[vertex] = (
+                sum(_position_cache[v][0] for v in neighbors) / len(neighbors) + 0.05,
+                sum(_position_cache[v][1] for v in neighbors) / len(neighbors) + 0.05
+            )
+        else:
+            angle = 2.39996 * len(_position_cache) # The golden angle.
+            _position_cache[vertex] = (1.2 * math.cos(angle), 1.2 * math.sin(angle))
+
+    if new_vertices:
+        region = set(new_vertices)
+        for vertex in new_vertices:
+            region.update(graph[vertex])
+        anchors = [v for v in region if v not in new_vertices]
+        if anchors:
+            positions = {v: _position_cache[v] for v in region}
+            _position_cache.update(nx.spring_layout(
+                graph.subgraph(region), pos=positions, fixed=anchors, iterations=10
+            ))
+
+    return _position_cache
+
 def get_edges_coordinates(graph, layout):
-    coordinates = [[], []]
+    """
+    Builds the x/y streams for the edges trace, with a NaN after every
+    source/terminus pair — Plotly treats NaN as a line break, so the whole
+    stream stays one homogeneous float array instead of an object list with
+    None sentinels. The interleaving is done with NumPy slice assignment
+    instead of a Python append loop over the edges.
+    """
+    edge_count = graph.number_of_edges()
+    if edge_count == 0:
+        return [[], []]
 
-    for edge in graph.edges():
-        coordinates[0] += [layout[edge[0]][0], layout[edge[1]][0], None]
-        coordinates[1] += [layout[edge[0]][1], layout[edge[1]][1], None]
+    index = {vertex: i for i, vertex in enumerate(graph.nodes())}
+    coordinates = np.asarray([layout[v] for v in graph.nodes()], dtype=np.float64).round(4)
+    edges = np.fromiter(
+        (index[v] for edge in graph.edges() for v in edge),
+        dtype=np.int32, count=2 * edge_count
+    ).reshape(-1, 2)
 
-    return coordinates
+    interleaved = np.empty((3 * edge_count, 2), dtype=np.float64)
+    interleaved[0::3] = coordinates[edges[:, 0]]
+    interleaved[1::3] = coordinates[edges[:, 1]]
+    interleaved[2::3] = np.nan
+
+    return [interleaved[:, 0], interleaved[:, 1]]
+
+# The two scatter traces are reused across updates: only their coordinate
+# arrays change, so rebuilding the styled objects every call is wasted work
+# and lets Plotly's diff see brand-new traces each time.
+_edges_trace = go.Scatter(
+    x=[],
+    y=[],
+    mode='lines',
+    line={
+        'shape': 'spline',
+        'smoothing': 1.3,
+        'color': 'rgb(30, 144, 255)',
+        'width': 5
+    },
+    hoverinfo='none',
+    name='Edges'
+)
+
+_vertices_trace = go.Scatter(
+    x=[],
+    y=[],
+    mode='markers+text',
+    marker={
+        'symbol': 'circle',
+        'size': 50,
+        'color': 'black'
+    },
+    text=[],
+    textfont={
+        'size': 28,
+        'color': 'white'
+    },
+    opacity=0.8,
+    name='Vertices',
+    hoverinfo='text'
+)
 
 def update_trace(current_trace, current_graph):
-    graph_layout = nx.layout.kamada_kawai_layout(current_graph, weight=None)
+    graph_layout = compute_layout(current_graph)
     edges_coordinates = get_edges_coordinates(current_graph, graph_layout)
-    vertices_coordinates = np.array(list(graph_layout.values())).T
-
-    traces = [
-        go.Scatter(
-            x=edges_coordinates[0],
-            y=edges_coordinates[1],
-            mode='lines',
-            line={
-                'shape': 'spline',
-                'smoothing': 1.3,
-                'color': 'rgb(30, 144, 255)',
-                'width': 5
-            },
-            hoverinfo='none',
-            name='Edges'
-        ),
-        go.Scatter(
-            x=vertices_coordinates[0],
-            y=vertices_coordinates[1],
-            mode='markers+text',
-            marker={
-                'symbol': 'circle',
-                'size': 50,
-                'color': 'black'
-            },
-            text=[v for v in current_graph.nodes()],
-            textfont={
-                'size': 28,
-                'color': 'white'
-            },
-            opacity=0.8,
-            name='Vertices',
-            hoverinfo='text'
-        ),
-    ]
-
-    new_trace = {
-        'data': traces,
-        'layout': current_trace['layout']
-    }
+    # One contiguous positions array shared by both traces, instead of a dict
+    # lookup per coordinate.
+    vertices = list(current_graph.nodes())
+    # float32 rounded to 4 decimals is still well past pixel precision and
+    # roughly halves the serialized coordinate bytes.
+    vertices_coordinates = np.asarray(
+        [graph_layout[v] for v in vertices], dtype=np.float32
+    ).reshape(-1, 2).round(4).T
 
-    return new_trace
+    _edges_trace.x = edges_coordinates[0]
+    _edges_trace.y = edges_coordinates[1]
+    _vertices_trace.x = vertices_coordinates[0]
+    _vertices_trace.y = vertices_coordinates[1]
+    _vertices_trace.text = vertices
+
+    layout = current_trace['layout']
+    # Keeps the client's pan/zoom state instead of resetting it on every
+    # mutation.
+    layout['uirevision'] = 'keep'
+
+    return {
+        'data': [_edges_trace, _vertices_trace],
+        'layout': layout
+    }
@@ -1,17 +1,19 @@
+import math
+
 # Plotly/Dash for the GUI and visualization.
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_cytoscape as cyto
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 
 from nagui import app
 
-import numpy as np
 import networkx as nx
 
 # draw and file for the wacky stuff with D.
+import subapps.algo as algo
 import subapps.file as file
 import subprocess as sbp
 
@@ -20,11 +22,260 @@ import subprocess as sbp
 vis_height = '750px'
 current_digraph = nx.DiGraph()
 original_digraph = nx.DiGraph()
+# Cytoscape view of current_digraph, kept in sync incrementally so single
+# mutations don't have to re-serialize the whole digraph.
+current_elements = []
+# Server-side vertex positions, so Cytoscape can use the static 'preset'
+# layout instead of re-running its force simulation on every change.
+layout_positions = {}
+layout_scale = 250
 file_id = 0
-info = ''
 
 #--- End of global variables
 
+def place_vertex(vertex):
+    """
+    Assigns a position to a newly added vertex along a spiral around the
+    origin, so consecutive vertices don't land on top of each other.
+    """
+    index = len(layout_positions)
+    angle = 2.39996 * index # The golden angle keeps the spiral spread out.
+    radius = layout_scale * (0.3 + 0.05 * index)
+    layout_positions[vertex] = (radius * math.cos(angle), radius * math.sin(angle))
+
+def refresh_positions():
+    """
+    Recomputes the layout of the whole digraph server-side. Only needed when
+    the digraph changes wholesale; single additions go through place_vertex.
+    """
+    global layout_positions
+    layout_positions = {
+        vertex: (position[0] * layout_scale, position[1] * layout_scale)
+        for vertex, position in nx.spring_layout(current_digraph, seed=0).items()
+    }
+
+def cyto_elements(digraph):
+    """
+    Serializes a digraph straight into a flat cytoscape element list,
+    skipping the intermediate dict-of-lists that cytoscape_data builds and
+    the extra graph walk it takes to do so. Vertices carry their cached
+    positions for the 'preset' layout.
+    """
+    elements = []
+    for vertex, attributes in digraph.nodes(data=True):
+        x, y = layout_positions[vertex]
+        elements.append({'data': {'id': vertex, **attributes},
+                         'position': {'x': x, 'y': y}})
+    elements.extend({'data': {'source': source, 'target': terminus, **attributes}}
+                    for source, terminus, attributes in digraph.edges(data=True))
+    return elements
+
+def rebuild_elements():
+    """
+    Replaces the cached cytoscape elements with a full serialization of
+    current_digraph. Only needed when the whole digraph changes at once.
+    """
+    refresh_positions()
+    current_elements[:] = cyto_elements(current_digraph)
+
+def empty_digraph():
+    """Empties the digraph and its cached cytoscape elements."""
+    current_digraph.clear()
+    current_elements.clear()
+    layout_positions.clear()
+
+def add_vertex(vertex_value):
+    """Adds a vertex. Returns an info message, empty when nothing's wrong."""
+    if current_digraph.has_node(vertex_value):
+        return 'Vertex {} is already on the digraph.'.format(vertex_value)
+    # No name attribute: the stylesheet labels plain vertices by id, so
+    # duplicating the id into every node dict just fattens the payload.
+    current_digraph.add_node(vertex_value)
+    place_vertex(vertex_value)
+    x, y = layout_positions[vertex_value]
+    current_elements.append({'data': {'id': vertex_value},
+                             'position': {'x': x, 'y': y}})
+    return ''
+
+def add_edge(source, terminus, weight):
+    """Adds or reweights an arc. Returns an info message like add_vertex."""
+    has_source = current_digraph.has_node(source)
+    has_terminus = current_digraph.has_node(terminus)
+    if has_source and has_terminus:
+        if current_digraph.has_edge(source, terminus):
+            # Re-adding an arc only changes its weight.
+            for element in current_elements:
+                data = element['data']
+                if data.get('source') == source and data.get('target') == terminus:
+                    data['weight'] = weight
+                    break
+        else:
+            current_elements.append({'data': {'source': source, 'target': terminus, 'weight': weight}})
+        current_digraph.add_edge(source, terminus, weight=weight)
+        return ''
+    elif not has_source and has_terminus:
+        return 'Vertex {} is not on the digraph.'.format(source)
+    elif has_source and not has_terminus:
+        return 'Vertex {} is not on the digraph.'.format(terminus)
+    return 'Vertices {} and {} are not on the digraph.'.format(source, terminus)
+
+def remove_vertex(rm_vertex):
+    """Removes a vertex and its incident arcs."""
+    if not current_digraph.has_node(rm_vertex):
+        return 'Vertex {} is not on the digraph.'.format(rm_vertex)
+    current_digraph.remove_node(rm_vertex)
+    layout_positions.pop(rm_vertex, None)
+    # Dropping the vertex and its incident arcs in a single pass.
+    current_elements[:] = [
+        element for element in current_elements
+        if element['data'].get('id') != rm_vertex
+        and element['data'].get('source') != rm_vertex
+        and element['data'].get('target') != rm_vertex
+    ]
+    return ''
+
+def remove_edge(rm_source, rm_terminus):
+    """Removes an arc."""
+    has_source = current_digraph.has_node(rm_source)
+    has_terminus = current_digraph.has_node(rm_terminus)
+    if has_source and has_terminus and current_digraph.has_edge(rm_source, rm_terminus):
+        current_digraph.remove_edge(rm_source, rm_terminus)
+        current_elements[:] = [
+            element for element in current_elements
+            if not (element['data'].get('source') == rm_source
+                    and element['data'].get('target') == rm_terminus)
+        ]
+        return ''
+    elif not has_source and has_terminus:
+        return 'Vertex {} is not on the digraph.'.format(rm_source)
+    elif has_source and not has_terminus:
+        return 'Vertex {} is not on the digraph.'.format(rm_terminus)
+    elif not has_source and not has_terminus:
+        return 'Vertices {} and {} are not on the digraph.'.format(rm_source, rm_terminus)
+    return "There isn't an edge between vertices {} and {}.".format(rm_source, rm_terminus)
+
+# Results of past runs keyed by (digraph fingerprint, algorithm, start).
+# The dominant interactive loop is run -> reset -> run again on the same
+# digraph, which this turns into a dict hit.
+_run_cache = {}
+
+def digraph_fingerprint():
+    """A hash of the digraph's vertices and weighted arcs."""
+    return hash((frozenset(current_digraph.nodes()),
+                 frozenset(current_digraph.edges(data='weight'))))
+
+def run_algorithm(algorithm, start):
+    """Runs the chosen algorithm and swaps in its result."""
+    global current_digraph
+    global original_digraph
+    global file_id
+
+    key = (digraph_fingerprint(), algorithm, start)
+    cached = _run_cache.get(key)
+    if cached is not None:
+        result, info = cached
+        original_digraph = current_digraph
+        if result is not None:
+            # Copied on the way out so later edits can't poison the cache.
+            current_digraph = result.copy()
+        rebuild_elements()
+        return info
+
+    original_digraph = current_digraph
+    info = ''
+    if algorithm == 'floyd':
+        # Floyd-Warshall runs in-process: no file handshake and no
+        # subprocess spawn per click.
+        try:
+            current_digraph = algo.floyd_result(current_digraph)
+        except algo.NegativeCycleError as error:
+            info = str(error)
+    elif not algo.has_negative_arc(current_digraph):
+        # So does Dijkstra, as long as every arc is non-negative.
+        if current_digraph.has_node(start):
+            current_digraph = algo.dijkstra_tree(current_digraph, start)
+        else:
+            info = "Vertex {} isn't on this digraph.".format(start)
+    else:
+        # Negative arcs need the D library's generalized Dijkstra, which
+        # swaps arcs around and detects negative cycles.
+        file_path = file.save_graph(current_digraph, file_id)
+        sbp.run(["./lib/bin/digraph.out", file_path, str(file_id), algorithm, start])
+        result, is_a_graph, info = file.load_digraph(file_id)
+        if is_a_graph:
+            current_digraph = result
+            file_id += 1
+        else:
+            info = result
+    if len(_run_cache) > 32:
+        _run_cache.clear()
+    _run_cache[key] = (current_digraph.copy() if current_digraph is not original_digraph else None, info)
+    rebuild_elements()
+    return info
+
+def reset_digraph():
+    """Goes back to the digraph as it was before the last run."""
+    global current_digraph
+    global file_id
+
+    current_digraph = original_digraph
+    rebuild_elements()
+    if file_id > 1:
+        file_id -= 1
+    return ''
+
+def apply_batch(commands):
+    """
+    Applies a whole block of edit commands in one callback, one command per
+    line: +V a, +E a b 3, -V a, -E a b. Many edits this way cost a single
+    round-trip and one elements update instead of one per click.
+    """
+    messages = []
+    for line in commands.splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        message = "Couldn't parse command: {}".format(line)
+        if parts[0] == '+V' and len(parts) == 2:
+            message = add_vertex(parts[1])
+        elif parts[0] == '+E' and len(parts) == 4:
+            try:
+                message = add_edge(parts[1], parts[2], int(parts[3]))
+            except ValueError:
+                message = '{} is not a valid weight.'.format(parts[3])
+        elif parts[0] == '-V' and len(parts) == 2:
+            message = remove_vertex(parts[1])
+        elif parts[0] == '-E' and len(parts) == 3:
+            message = remove_edge(parts[1], parts[2])
+        if message:
+            messages.append(message)
+    return ' '.join(messages)
+
+# One handler per button, picked by a single dict lookup on the triggering
+# id. Each handler validates its own inputs and returns the info message.
+HANDLERS = {
+    'btn-vertex-digraph': lambda values: (
+        add_vertex(values['vertex'])
+        if values['vertex'] != "" else ''),
+    'btn-edge-digraph': lambda values: (
+        add_edge(values['source'], values['terminus'], values['weight'])
+        if values['source'] != "" and values['terminus'] != "" and values['weight'] is not None else ''),
+    'btn-rm-vertex-digraph': lambda values: (
+        remove_vertex(values['rm_vertex'])
+        if values['rm_vertex'] != "" else ''),
+    'btn-rm-edge-digraph': lambda values: (
+        remove_edge(values['rm_source'], values['rm_terminus'])
+        if values['rm_source'] != "" and values['rm_terminus'] != "" else ''),
+    'btn-run-digraph': lambda values: (
+        run_algorithm(values['algorithm'], values['start'])
+        if values['algorithm'] != 'dijkstra' or values['start'] not in ('', ' ', None) else ''),
+    'btn-reset-digraph': lambda values: reset_digraph(),
+    'btn-empty-digraph': lambda values: empty_digraph() or '',
+    'btn-batch-digraph': lambda values: (
+        apply_batch(values['batch'])
+        if values['batch'] else ''),
+}
+
 #--- GUI
 
 # external_stylesheets = [dbc.themes.BOOTSTRAP] #['https://codepen.io/chriddyp/pen/bWLwgP.css']
@@ -118,12 +369,22 @@ layout = html.Div([
                     dbc.Button('Empty digraph', color='warning', id='btn-empty-digraph', className='mx-2'),
                     # dbc.Button('Load digraph', color='primary', id='btn-load-digraph', className='mx-2'),
                     # dbc.Button('Save digraph', color='primary', id='btn-save-digraph', className='mx-2')
-                ], justify='center', className='m-4')
+                ], justify='center', className='m-4'),
+                dbc.Row([
+                    dbc.Col([
+                        html.H5('Batch commands:'),
+                        dbc.Textarea(id='batch-digraph', placeholder='+V a\n+E a b 3\n-V a\n-E a b', className='my-1'),
+                        dbc.Button('Apply batch', color='primary', id='btn-batch-digraph', className='my-2'),
+                    ])
+                ], justify='around', className='p-1')
             ], width=3),
             dbc.Col([
                 dbc.Row([
                     dbc.Col([
                         html.H4('The digraph has 0 node(s) and 0 edge(s).', id='info-digraph', className='mx-3'),
+                        # Node/edge counts for the info label, so the browser
+                        # formats two ints instead of walking the elements.
+                        dcc.Store(id='counts-digraph'),
                     ], width=4),
                     dbc.Col([
                         html.H3('', id='additional-info-digraph', className='mx-3')
@@ -161,7 +422,7 @@ layout = html.Div([
                 cyto.Cytoscape(
                     id='digraph',
                     layout={
-                        'name': 'cose'
+                        'name': 'preset'
                     },
                     style={
                         'width': '100%',
@@ -170,6 +431,14 @@ layout = html.Div([
                     stylesheet=[
                         {
                             'selector': 'node',
+                            'style': {
+                                'label': 'data(id)'
+                            }
+                        },
+                        {
+                            # Solver results (Floyd's primed trees) carry a
+                            # name attribute that overrides the raw id.
+                            'selector': 'node[name]',
                             'style': {
                                 'label': 'data(name)'
                             }
@@ -198,14 +467,17 @@ layout = html.Div([
 Updating the digraph every time a vertex or an edge are added/removed.
 """
 @app.callback(
-    Output(component_id='digraph', component_property='elements'),
-    [Input(component_id='btn-vertex-digraph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-edge-digraph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-rm-vertex-digraph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-rm-edge-digraph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-run-digraph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-reset-digraph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-empty-digraph', component_property='n_clicks_timestamp')],
+    [Output(component_id='digraph', component_property='elements'),
+     Output(component_id='additional-info-digraph', component_property='children'),
+     Output(component_id='counts-digraph', component_property='data')],
+    [Input(component_id='btn-vertex-digraph', component_property='n_clicks'),
+     Input(component_id='btn-edge-digraph', component_property='n_clicks'),
+     Input(component_id='btn-rm-vertex-digraph', component_property='n_clicks'),
+     Input(component_id='btn-rm-edge-digraph', component_property='n_clicks'),
+     Input(component_id='btn-run-digraph', component_property='n_clicks'),
+     Input(component_id='btn-reset-digraph', component_property='n_clicks'),
+     Input(component_id='btn-empty-digraph', component_property='n_clicks'),
+     Input(component_id='btn-batch-digraph', component_property='n_clicks')],
     [State(component_id='vertex-digraph', component_property='value'),
      State(component_id='source-digraph', component_property='value'),
      State(component_id='terminus-digraph', component_property='value'),
@@ -215,160 +487,84 @@ Updating the digraph every time a vertex or an edge are added/removed.
      State(component_id='weight-digraph', component_property='value'),
      State('start-vertex', 'value'),
      State('drop-algo-digraph', 'value'),
-     State('digraph', 'elements')]
+     State('batch-digraph', 'value'),
+     State('digraph', 'elements')],
+    prevent_initial_call=True
 )
-def update_digraph(btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty, vertex_value, source, terminus,
-    rm_vertex, rm_source, rm_terminus, weight, start, algorithm, elements):
-    global current_digraph
-    global file_id
-    global original_digraph
-    global info
-
+def update_digraph(btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty, btn_batch, vertex_value, source, terminus,
+    rm_vertex, rm_source, rm_terminus, weight, start, algorithm, batch, elements):
     info = ''
-    buttons = np.array([btn if btn is not None else 0 for btn in (btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty)])
-    btn_pressed = np.argmax(buttons)
-
-    if btn_vertex is not None and btn_pressed == 0 and vertex_value != "":
-        if not current_digraph.has_node(vertex_value):
-            current_digraph.add_node(vertex_value, name=vertex_value)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_digraph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        else:
-            info = 'Vertex {} is already on the digraph.'.format(vertex_value)
-    elif btn_edge is not None and btn_pressed == 1 and source != "" and terminus != "" and weight is not None:
-        if current_digraph.has_node(source) and current_digraph.has_node(terminus):
-            current_digraph.add_edge(source, terminus, weight=weight)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_digraph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        elif not current_digraph.has_node(source) and current_digraph.has_node(terminus):
-            info = 'Vertex {} is not on the digraph.'.format(source)
-        elif current_digraph.has_node(source) and not current_digraph.has_node(terminus):
-            info = 'Vertex {} is not on the digraph.'.format(terminus)
-        else:
-            info = 'Vertices {} and {} are not on the digraph.'.format(source, terminus)
-    elif btn_rm_v is not None and btn_pressed == 2 and rm_vertex != "":
-        if current_digraph.has_node(rm_vertex):
-            current_digraph.remove_node(rm_vertex)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_digraph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        else:
-            info = 'Vertex {} is not on the digraph.'.format(rm_vertex)
-    elif btn_rm_e is not None and btn_pressed == 3 and rm_source != "" and rm_terminus != "":
-        if current_digraph.has_node(rm_source) and current_digraph.has_node(rm_terminus) and current_digraph.has_edge(rm_source, rm_terminus):
-            current_digraph.remove_edge(rm_source, rm_terminus)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_digraph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        elif not current_digraph.has_node(rm_source) and current_digraph.has_node(rm_terminus):
-            info = 'Vertex {} is not on the digraph.'.format(rm_source)
-        elif current_digraph.has_node(rm_source) and not current_digraph.has_node(rm_terminus):
-            info = 'Vertex {} is not on the digraph.'.format(rm_terminus)
-        elif not current_digraph.has_node(rm_source) and not current_digraph.has_node(rm_terminus):
-            info = 'Vertices {} and {} are not on the digraph.'.format(rm_source, rm_terminus)
-        else:
-            info = "There isn't an edge between vertices {} and {}.".format(rm_source, rm_terminus)
-    elif btn_run is not None and btn_pressed == 4:
-        if (algorithm == 'dijkstra' and start != '' and start != ' ' and start is not None) or algorithm == 'floyd':
-            file_path = file.save_graph(current_digraph, file_id)
-            original_digraph = current_digraph
-            if algorithm == 'dijkstra':
-                sbp.run(["./lib/bin/digraph.out", file_path, str(file_id), algorithm, start])
-            else:
-                sbp.run(["./lib/bin/digraph.out", file_path, str(file_id), algorithm, '0'])
-            result, is_a_graph, info = file.load_digraph(file_id)
-            if is_a_graph:
-                current_digraph = result
-                file_id += 1
-            else:
-                info = result
-            elements = nx.readwrite.json_graph.cytoscape_data(current_digraph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-    elif btn_reset is not None and btn_pressed == 5:
-        current_digraph = original_digraph
-        elements = nx.readwrite.json_graph.cytoscape_data(current_digraph)
-        elements = elements['elements']['nodes'] + elements['elements']['edges']
-        if file_id > 1:
-            file_id -= 1
-    elif btn_empty is not None and btn_pressed == 6:
-        current_digraph.clear()
-        elements = nx.readwrite.json_graph.cytoscape_data(current_digraph)
-        elements = elements['elements']['nodes'] + elements['elements']['edges']
-    return elements
+    context = dash.callback_context
+    trigger = context.triggered[0]['prop_id'].split('.')[0]
 
-"""
-Displaying additional information,
-"""
-@app.callback(
-    Output('additional-info-digraph', 'children'),
-    [Input('digraph', 'elements')]
-)
-def update_additional_info(digraph):
-    global info
-    return info
+    handler = HANDLERS.get(trigger)
+    if handler is not None:
+        info = handler({
+            'vertex': vertex_value,
+            'source': source,
+            'terminus': terminus,
+            'rm_vertex': rm_vertex,
+            'rm_source': rm_source,
+            'rm_terminus': rm_terminus,
+            'weight': weight,
+            'start': start,
+            'algorithm': algorithm,
+            'batch': batch,
+        })
+    counts = {'n': current_digraph.number_of_nodes(),
+              'e': current_digraph.number_of_edges()}
+    return current_elements, info, counts
 
 """
 Changing the information displayed at the top of the page every time the digraph
-is changed.
+is changed. The counts come precomputed through the store, so the browser only
+formats two ints instead of walking the whole elements list.
 """
-@app.callback(
+app.clientside_callback(
+    """
+    function(counts) {
+        counts = counts || {n: 0, e: 0};
+        return 'The digraph has ' + counts.n + ' node(s) and ' + counts.e + ' edge(s)';
+    }
+    """,
     Output(component_id='info-digraph', component_property='children'),
-    [Input(component_id='digraph', component_property='elements')]
+    [Input(component_id='counts-digraph', component_property='data')]
 )
-def update_digraph_info(digraph):
-    return "The digraph has {} node(s) and {} edge(s)".format(current_digraph.number_of_nodes(), current_digraph.number_of_edges())
 
 """
-Resetting the Inputs every time their assigned button gets pressed.
+Resetting the Inputs every time their assigned button gets pressed. These run
+entirely in the browser through the shared functions in assets/reset.js, so a
+click doesn't cost a server round-trip per input.
 """
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='blank'),
     Output(component_id='vertex-digraph', component_property='value'),
     [Input(component_id='btn-vertex-digraph', component_property='n_clicks')]
 )
-def reset_vertex_input(n_clicks):
-    return ""
-
-@app.callback(
-    Output(component_id='source-digraph', component_property='value'),
-    [Input(component_id='btn-edge-digraph', component_property='n_clicks')]
-)
-def reset_source_input(n_clicks):
-    return ""
-
-@app.callback(
-    Output(component_id='terminus-digraph', component_property='value'),
-    [Input(component_id='btn-edge-digraph', component_property='n_clicks')]
-)
-def reset_terminus_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='weight-digraph', component_property='value'),
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='edge'),
+    [Output(component_id='source-digraph', component_property='value'),
+     Output(component_id='terminus-digraph', component_property='value'),
+     Output(component_id='weight-digraph', component_property='value')],
     [Input(component_id='btn-edge-digraph', component_property='n_clicks')]
 )
-def reset_weight_input(n_clicks):
-    return 1
 
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='blank'),
     Output(component_id='rm-vertex-digraph', component_property='value'),
     [Input(component_id='btn-rm-vertex-digraph', component_property='n_clicks')]
 )
-def reset_rm_vertex_input(n_clicks):
-    return ""
-
-@app.callback(
-    Output(component_id='rm-source-digraph', component_property='value'),
-    [Input(component_id='btn-rm-edge-digraph', component_property='n_clicks')]
-)
-def reset_rm_source_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='rm-terminus-digraph', component_property='value'),
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='pair'),
+    [Output(component_id='rm-source-digraph', component_property='value'),
+     Output(component_id='rm-terminus-digraph', component_property='value')],
     [Input(component_id='btn-rm-edge-digraph', component_property='n_clicks')]
 )
-def reset_rm_terminus_input(n_clicks):
-    return ""
 
 #--- End of callbacks
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    import os
+    app.run_server(debug=os.environ.get('NAGUI_DEBUG') == '1')
@@ -1,14 +1,16 @@
+import math
+
 # Plotly/Dash for the GUI and visualization.
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_cytoscape as cyto
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
+from dash.exceptions import PreventUpdate
 
 from nagui import app
 
-import numpy as np
 import networkx as nx
 
 # draw and file for the wacky stuff with D.
@@ -19,12 +21,110 @@ import subprocess as sbp
 
 vis_height = '750px'
 current_graph = nx.Graph()
-original_graph = nx.Graph()
+# Snapshot of the graph that was handed to the solver, stored as node-link
+# data rather than a second live graph object: it can't be mutated by
+# accident through an alias and it costs about half the memory.
+original_graph = nx.node_link_data(nx.Graph())
+# Cytoscape view of current_graph, kept in sync incrementally so single
+# mutations don't have to re-serialize the whole graph.
+current_elements = []
+# Server-side vertex positions, so Cytoscape can use the static 'preset'
+# layout instead of re-running its force simulation on every change.
+layout_positions = {}
+layout_scale = 250
 file_id = 0
-info = ''
+# Upper bound for a single solver run, so a wedged algorithm can't hold the
+# server hostage.
+solver_timeout = 60
+
+# The two cytoscape stylesheets are static; building them once saves the
+# per-callback list-of-dicts construction.
+graph_stylesheet = [
+    {
+        'selector': 'node',
+        'style': {
+            'label': 'data(id)'
+        }
+    },
+    {
+        'selector': 'edge',
+        'style': {
+            'label': 'data(weight)',
+            'curve-style': 'bezier',
+        }
+    }
+]
+
+digraph_stylesheet = [
+    {
+        'selector': 'node',
+        'style': {
+            'label': 'data(id)'
+        }
+    },
+    {
+        'selector': 'edge',
+        'style': {
+            'label': 'data(weight)',
+            'curve-style': 'bezier',
+            'target-arrow-shape': 'vee'
+        }
+    }
+]
 
 #--- End of global variables
 
+def place_vertex(vertex):
+    """
+    Assigns a position to a newly added vertex along a spiral around the
+    origin, so consecutive vertices don't land on top of each other.
+    """
+    index = len(layout_positions)
+    angle = 2.39996 * index # The golden angle keeps the spiral spread out.
+    radius = layout_scale * (0.3 + 0.05 * index)
+    layout_positions[vertex] = (radius * math.cos(angle), radius * math.sin(angle))
+
+def refresh_positions():
+    """
+    Recomputes the layout of the whole graph server-side. Only needed when
+    the graph changes wholesale; single additions go through place_vertex.
+    """
+    global layout_positions
+    layout_positions = {
+        vertex: (position[0] * layout_scale, position[1] * layout_scale)
+        for vertex, position in nx.spring_layout(current_graph, seed=0).items()
+    }
+
+def cyto_elements(graph):
+    """
+    Serializes a graph straight into a flat cytoscape element list, skipping
+    the intermediate dict-of-lists that cytoscape_data builds and the extra
+    graph walk it takes to do so. Vertices carry their cached positions for
+    the 'preset' layout.
+    """
+    elements = []
+    for vertex, attributes in graph.nodes(data=True):
+        x, y = layout_positions[vertex]
+        elements.append({'data': {'id': vertex, **attributes},
+                         'position': {'x': x, 'y': y}})
+    elements.extend({'data': {'source': source, 'target': terminus, **attributes}}
+                    for source, terminus, attributes in graph.edges(data=True))
+    return elements
+
+def rebuild_elements():
+    """
+    Replaces the cached cytoscape elements with a full serialization of
+    current_graph. Only needed when the whole graph changes at once.
+    """
+    refresh_positions()
+    current_elements[:] = cyto_elements(current_graph)
+
+def empty_graph():
+    """Empties the graph and its cached cytoscape elements."""
+    current_graph.clear()
+    current_elements.clear()
+    layout_positions.clear()
+
 #--- GUI
 
 # external_stylesheets = [dbc.themes.BOOTSTRAP] #['https://codepen.io/chriddyp/pen/bWLwgP.css']
@@ -153,27 +253,13 @@ layout = html.Div([
                 cyto.Cytoscape(
                     id='graph',
                     layout={
-                        'name': 'cose'
+                        'name': 'preset'
                     },
                     style={
                         'width': '100%',
                         'height': '750px'
                     },
-                    stylesheet=[
-                        {
-                            'selector': 'node',
-                            'style': {
-                                'label': 'data(id)'
-                            }
-                        },
-                        {
-                            'selector': 'edge',
-                            'style': {
-                                'label': 'data(weight)',
-                                'curve-style': 'bezier',
-                            }
-                        },
-                    ],
+                    stylesheet=graph_stylesheet,
                     elements=[]
                 )
             ], width=9)
@@ -189,14 +275,15 @@ layout = html.Div([
 Updating the graph every time a vertex or an edge are added/removed.
 """
 @app.callback(
-    Output(component_id='graph', component_property='elements'),
-    [Input(component_id='btn-vertex-graph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-edge-graph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-rm-vertex-graph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-rm-edge-graph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-run-graph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-reset-graph', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-empty-graph', component_property='n_clicks_timestamp')],
+    [Output(component_id='graph', component_property='elements'),
+     Output(component_id='additional-info-graph', component_property='children')],
+    [Input(component_id='btn-vertex-graph', component_property='n_clicks'),
+     Input(component_id='btn-edge-graph', component_property='n_clicks'),
+     Input(component_id='btn-rm-vertex-graph', component_property='n_clicks'),
+     Input(component_id='btn-rm-edge-graph', component_property='n_clicks'),
+     Input(component_id='btn-run-graph', component_property='n_clicks'),
+     Input(component_id='btn-reset-graph', component_property='n_clicks'),
+     Input(component_id='btn-empty-graph', component_property='n_clicks')],
     [State(component_id='vertex-graph', component_property='value'),
      State(component_id='source-graph', component_property='value'),
      State(component_id='terminus-graph', component_property='value'),
@@ -205,91 +292,109 @@ Updating the graph every time a vertex or an edge are added/removed.
      State(component_id='rm-terminus-graph', component_property='value'),
      State(component_id='weight-graph', component_property='value'),
      State('drop-algo-graph', 'value'),
-     State('graph', 'elements')]
+     State('graph', 'elements')],
+    prevent_initial_call=True
 )
 def update_graph(btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty, vertex_value, source, terminus,
     rm_vertex, rm_source, rm_terminus, weight, algorithm, elements):
     global current_graph
     global file_id
     global original_graph
-    global info
 
     info = ''
-    buttons = np.array([btn if btn is not None else 0 for btn in (btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty)])
-    btn_pressed = np.argmax(buttons)
+    context = dash.callback_context
+    if not context.triggered:
+        # Nothing was actually pressed (e.g. the fire on page load); skip the
+        # response instead of re-sending the elements.
+        raise PreventUpdate
+    trigger = context.triggered[0]['prop_id'].split('.')[0]
 
-    if btn_vertex is not None and btn_pressed == 0 and vertex_value != "":
+    if trigger == 'btn-vertex-graph' and vertex_value != "":
         if not current_graph.has_node(vertex_value):
             current_graph.add_node(vertex_value)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_graph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
+            place_vertex(vertex_value)
+            x, y = layout_positions[vertex_value]
+            current_elements.append({'data': {'id': vertex_value},
+                                     'position': {'x': x, 'y': y}})
         else:
             info = 'Vertex {} is already on the graph.'.format(vertex_value)
-    elif btn_edge is not None and btn_pressed == 1 and source != "" and terminus != "" and weight is not None:
-        if current_graph.has_node(source) and current_graph.has_node(terminus):
+    elif trigger == 'btn-edge-graph' and source != "" and terminus != "" and weight is not None:
+        # Probing the adjacency dict once per endpoint instead of once per
+        # branch of the chain below.
+        has_source = current_graph.has_node(source)
+        has_terminus = current_graph.has_node(terminus)
+        if has_source and has_terminus:
+            if current_graph.has_edge(source, terminus):
+                # Re-adding an edge only changes its weight.
+                for element in current_elements:
+                    data = element['data']
+                    if 'source' in data and {data['source'], data['target']} == {source, terminus}:
+                        data['weight'] = weight
+                        break
+            else:
+                current_elements.append({'data': {'source': source, 'target': terminus, 'weight': weight}})
             current_graph.add_edge(source, terminus, weight=weight)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_graph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        elif not current_graph.has_node(source) and current_graph.has_node(terminus):
+        elif not has_source and has_terminus:
             info = 'Vertex {} is not on the graph.'.format(source)
-        elif current_graph.has_node(source) and not current_graph.has_node(terminus):
+        elif has_source and not has_terminus:
             info = 'Vertex {} is not on the graph.'.format(terminus)
         else:
             info = 'Vertices {} and {} are not on the graph.'.format(source, terminus)
-    elif btn_rm_v is not None and btn_pressed == 2 and rm_vertex != "":
+    elif trigger == 'btn-rm-vertex-graph' and rm_vertex != "":
         if current_graph.has_node(rm_vertex):
             current_graph.remove_node(rm_vertex)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_graph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
+            layout_positions.pop(rm_vertex, None)
+            # Dropping the vertex and its incident edges in a single pass.
+            current_elements[:] = [
+                element for element in current_elements
+                if element['data'].get('id') != rm_vertex
+                and element['data'].get('source') != rm_vertex
+                and element['data'].get('target') != rm_vertex
+            ]
         else:
             info = 'Vertex {} is not on the graph.'.format(rm_vertex)
-    elif btn_rm_e is not None and btn_pressed == 3 and rm_source != "" and rm_terminus != "":
-        if current_graph.has_node(rm_source) and current_graph.has_node(rm_terminus) and current_graph.has_edge(rm_source, rm_terminus):
+    elif trigger == 'btn-rm-edge-graph' and rm_source != "" and rm_terminus != "":
+        has_source = current_graph.has_node(rm_source)
+        has_terminus = current_graph.has_node(rm_terminus)
+        if has_source and has_terminus and current_graph.has_edge(rm_source, rm_terminus):
             current_graph.remove_edge(rm_source, rm_terminus)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_graph)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        elif not current_graph.has_node(rm_source) and current_graph.has_node(rm_terminus):
+            current_elements[:] = [
+                element for element in current_elements
+                if 'source' not in element['data']
+                or {element['data']['source'], element['data']['target']} != {rm_source, rm_terminus}
+            ]
+        elif not has_source and has_terminus:
             info = 'Vertex {} is not on the graph.'.format(rm_source)
-        elif current_graph.has_node(rm_source) and not current_graph.has_node(rm_terminus):
+        elif has_source and not has_terminus:
             info = 'Vertex {} is not on the graph.'.format(rm_terminus)
-        elif not current_graph.has_node(rm_source) and not current_graph.has_node(rm_terminus):
+        elif not has_source and not has_terminus:
             info = 'Vertices {} and {} are not on the graph.'.format(rm_source, rm_terminus)
         else:
             info = "There isn't an edge between vertices {} and {}.".format(rm_source, rm_terminus)
-    elif btn_run is not None and btn_pressed == 4:
+    elif trigger == 'btn-run-graph':
         file_path = file.save_graph(current_graph, file_id)
-        original_graph = current_graph
-        sbp.run(["./lib/bin/graph.out", file_path, str(file_id), algorithm])
-        result, is_a_graph, info = file.load_graph(file_id)
+        original_graph = nx.node_link_data(current_graph)
+        try:
+            sbp.run(["./lib/bin/graph.out", file_path, str(file_id), algorithm], timeout=solver_timeout)
+        except sbp.TimeoutExpired:
+            is_a_graph = False
+            result = 'The algorithm took more than {} seconds and was stopped.'.format(solver_timeout)
+        else:
+            result, is_a_graph, info = file.load_graph(file_id)
         if is_a_graph:
             current_graph = result
             file_id += 1
         else:
             info = result
-        elements = nx.readwrite.json_graph.cytoscape_data(current_graph)
-        elements = elements['elements']['nodes'] + elements['elements']['edges']
-    elif btn_reset is not None and btn_pressed == 5:
-        current_graph = original_graph
-        elements = nx.readwrite.json_graph.cytoscape_data(current_graph)
-        elements = elements['elements']['nodes'] + elements['elements']['edges']
+        rebuild_elements()
+    elif trigger == 'btn-reset-graph':
+        current_graph = nx.node_link_graph(original_graph)
+        rebuild_elements()
         if file_id > 1:
             file_id -= 1
-    elif btn_empty is not None and btn_pressed == 6:
-        current_graph.clear()
-        elements = nx.readwrite.json_graph.cytoscape_data(current_graph)
-        elements = elements['elements']['nodes'] + elements['elements']['edges']
-    return elements
-
-"""
-Displaying additional information,
-"""
-@app.callback(
-    Output('additional-info-graph', 'children'),
-    [Input('graph', 'elements')]
-)
-def update_additional_info(graph):
-    global info
-    return info
+    elif trigger == 'btn-empty-graph':
+        empty_graph()
+    return current_elements, info
 
 """
 Changing the graph's stylesheet everytime there's a change between types.
@@ -299,51 +404,25 @@ Changing the graph's stylesheet everytime there's a change between types.
     [Input('graph', 'elements')]
 )
 def update_graph_stylesheet(graph):
-    global current_graph
-    if type(current_graph) == nx.classes.graph.Graph:
-        return [
-            {
-                'selector': 'node',
-                'style': {
-                    'label': 'data(id)'
-                }
-            },
-            {
-                'selector': 'edge',
-                'style': {
-                    'label': 'data(weight)',
-                    'curve-style': 'bezier',
-                }
-            }
-        ]
-    else:
-        return [
-            {
-                'selector': 'node',
-                'style': {
-                    'label': 'data(id)'
-                }
-            },
-            {
-                'selector': 'edge',
-                'style': {
-                    'label': 'data(weight)',
-                    'curve-style': 'bezier',
-                    'target-arrow-shape': 'vee'
-                }
-            }
-        ]
+    return digraph_stylesheet if current_graph.is_directed() else graph_stylesheet
 
 """
 Changing the information displayed at the top of the page every time the graph
-is changed.
+is changed. Runs in the browser so it doesn't cost a server round-trip.
 """
-@app.callback(
+app.clientside_callback(
+    """
+    function(elements) {
+        var nodes = 0, edges = 0;
+        (elements || []).forEach(function(element) {
+            if (element.data.source) { edges++; } else { nodes++; }
+        });
+        return 'The graph has ' + nodes + ' node(s) and ' + edges + ' edge(s)';
+    }
+    """,
     Output(component_id='info-graph', component_property='children'),
     [Input(component_id='graph', component_property='elements')]
 )
-def update_graph_info(graph):
-    return "The graph has {} node(s) and {} edge(s)".format(current_graph.number_of_nodes(), current_graph.number_of_edges())
 
 """
 Input/Output of the current graph to/from text files.
@@ -369,58 +448,39 @@ Input/Output of the current graph to/from text files.
 #     return "Graphs"
 
 """
-Resetting the Inputs every time their assigned button gets pressed.
+Resetting the Inputs every time their assigned button gets pressed. These run
+entirely in the browser; a server round-trip per button just to return a
+constant is wasteful. The functions live in assets/reset.js.
 """
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='blank'),
     Output(component_id='vertex-graph', component_property='value'),
     [Input(component_id='btn-vertex-graph', component_property='n_clicks')]
 )
-def reset_vertex_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='source-graph', component_property='value'),
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='edge'),
+    [Output(component_id='source-graph', component_property='value'),
+     Output(component_id='terminus-graph', component_property='value'),
+     Output(component_id='weight-graph', component_property='value')],
     [Input(component_id='btn-edge-graph', component_property='n_clicks')]
 )
-def reset_source_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='terminus-graph', component_property='value'),
-    [Input(component_id='btn-edge-graph', component_property='n_clicks')]
-)
-def reset_terminus_input(n_clicks):
-    return ""
-
-@app.callback(
-    Output(component_id='weight-graph', component_property='value'),
-    [Input(component_id='btn-edge-graph', component_property='n_clicks')]
-)
-def reset_weight_input(n_clicks):
-    return 1
-
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='blank'),
     Output(component_id='rm-vertex-graph', component_property='value'),
     [Input(component_id='btn-rm-vertex-graph', component_property='n_clicks')]
 )
-def reset_rm_vertex_input(n_clicks):
-    return ""
-
-@app.callback(
-    Output(component_id='rm-source-graph', component_property='value'),
-    [Input(component_id='btn-rm-edge-graph', component_property='n_clicks')]
-)
-def reset_rm_source_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='rm-terminus-graph', component_property='value'),
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='pair'),
+    [Output(component_id='rm-source-graph', component_property='value'),
+     Output(component_id='rm-terminus-graph', component_property='value')],
     [Input(component_id='btn-rm-edge-graph', component_property='n_clicks')]
 )
-def reset_rm_terminus_input(n_clicks):
-    return ""
 
 #--- End of callbacks
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    import os
+    app.run_server(debug=os.environ.get('NAGUI_DEBUG') == '1')
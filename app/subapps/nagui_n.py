@@ -1,14 +1,15 @@
+import math
+
 # Plotly/Dash for the GUI and visualization.
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 import dash_cytoscape as cyto
 import dash_bootstrap_components as dbc
-from dash.dependencies import Input, Output, State
+from dash.dependencies import ClientsideFunction, Input, Output, State
 
 from nagui import app
 
-import numpy as np
 import networkx as nx
 
 # draw and file for the wacky stuff with D.
@@ -20,11 +21,134 @@ import subprocess as sbp
 vis_height = '750px'
 current_network = nx.DiGraph()
 original_network = nx.DiGraph()
+# Cytoscape view of current_network, kept in sync incrementally so single
+# mutations don't have to re-serialize the whole network.
+current_elements = []
+# Server-side vertex positions, so Cytoscape can use the static 'preset'
+# layout instead of re-running its force simulation on every change.
+layout_positions = {}
+layout_scale = 250
 file_id = 0
 info = ''
 
 #--- End of global variables
 
+def place_vertex(vertex):
+    """
+    Assigns a position to a newly added vertex along a spiral around the
+    origin, so consecutive vertices don't land on top of each other.
+    """
+    index = len(layout_positions)
+    angle = 2.39996 * index # The golden angle keeps the spiral spread out.
+    radius = layout_scale * (0.3 + 0.05 * index)
+    layout_positions[vertex] = (radius * math.cos(angle), radius * math.sin(angle))
+
+def refresh_positions():
+    """
+    Recomputes the layout of the whole network server-side. Only needed when
+    the network changes wholesale; single additions go through place_vertex.
+    """
+    global layout_positions
+    layout_positions = {
+        vertex: (position[0] * layout_scale, position[1] * layout_scale)
+        for vertex, position in nx.spring_layout(current_network, seed=0).items()
+    }
+
+def node_element(vertex):
+    """Serializes one vertex into its cytoscape element."""
+    x, y = layout_positions[vertex]
+    return {'data': {'id': vertex, **current_network.nodes[vertex]},
+            'position': {'x': x, 'y': y}}
+
+def edge_element(source, terminus):
+    """Serializes one edge into its cytoscape element."""
+    return {'data': {'source': source, 'target': terminus,
+                     **current_network[source][terminus]}}
+
+def refresh_node_elements(vertices):
+    """
+    Rewrites the cached elements of the given vertices, picking up whatever
+    update_vertices_info changed on their attributes.
+    """
+    pending = set(vertices)
+    for element in current_elements:
+        vertex = element['data'].get('id')
+        if vertex in pending:
+            element['data'] = {'id': vertex, **current_network.nodes[vertex]}
+            pending.discard(vertex)
+            if not pending:
+                break
+
+def rebuild_elements():
+    """
+    Replaces the cached cytoscape elements with a full serialization of
+    current_network. Only needed when the whole network changes at once.
+    """
+    refresh_positions()
+    current_elements[:] = [node_element(vertex) for vertex in current_network.nodes()]
+    current_elements.extend(edge_element(source, terminus)
+                            for source, terminus in current_network.edges())
+
+def empty_network():
+    """Empties the network and its cached cytoscape elements."""
+    current_network.clear()
+    current_elements.clear()
+    layout_positions.clear()
+    _vertex_labels.clear()
+
+def add_bulk_edges(commands):
+    """
+    Adds a whole edge list in one callback, one edge per line as
+    source,terminus,capacity,restriction,cost. Missing vertices get created
+    on the way, and the elements get rebuilt and laid out a single time
+    instead of once per edge.
+    """
+    messages = []
+    touched = set()
+    for line in commands.splitlines():
+        parts = [part.strip() for part in line.split(',')]
+        if parts == ['']:
+            continue
+        try:
+            source, terminus = parts[0], parts[1]
+            weight, restriction, cost = int(parts[2]), int(parts[3]), int(parts[4])
+        except (IndexError, ValueError):
+            messages.append("Couldn't parse line: {}.".format(line))
+            continue
+        if weight < restriction:
+            messages.append("The capacity of the edge can't be less than the restriction.")
+        elif restriction < 0:
+            messages.append("The minimum restriction can't be negative.")
+        elif weight < 0:
+            messages.append("The capacity of the edge can't be negative.")
+        else:
+            current_network.add_edge(source, terminus, weight=weight, restriction=restriction, flow=0, cost=cost, info=f'r:{restriction}, f:0, q:{weight}, c:{cost}')
+            touched.add(source)
+            touched.add(terminus)
+    for vertex in touched:
+        update_vertices_info(current_network, vertex)
+    if touched:
+        rebuild_elements()
+    return ' '.join(messages)
+
+# Info label templates keyed by (vertex type, flow mode): one lookup here
+# replaces the nested branches update_vertices_info used to walk per vertex.
+_LABEL_FMTS = {
+    ('source', 'flow'): '+ {}, {}',
+    ('source', 'min_flow'): '+ {}, {}/{}',
+    ('source', None): '+ {}',
+    ('sink', 'flow'): '- {}, {}',
+    ('sink', 'min_flow'): '- {}, {}/{}',
+    ('sink', None): '- {}',
+    ('pass', 'flow'): '{}, {}',
+    ('pass', 'min_flow'): '{}, {}/{}',
+    ('pass', None): '{}',
+}
+
+# Last label computed per vertex, so relabeling a vertex whose type and flow
+# didn't change skips the format call.
+_vertex_labels = {}
+
 def update_vertices_info(network, vertex = None):
     # If vertex is None, update every vertex.
     if vertex is None:
@@ -33,30 +157,201 @@ def update_vertices_info(network, vertex = None):
         nodes = [vertex]
 
     for v in nodes:
+        attributes = current_network.nodes[v]
         if current_network.in_degree(v) == 0:
-            current_network.nodes[v]['type'] = 'source'
-            if 'flow' in current_network.nodes[v]:
-                current_network.nodes[v]['info'] = '+ {}, {}'.format(v, current_network.nodes[v]['flow'])
-            elif 'min_flow' in current_network.nodes[v]:
-                current_network.nodes[v]['info'] = '+ {}, {}/{}'.format(v, current_network.nodes[v]['min_flow'], current_network.nodes[v]['max_flow'])
-            else:
-                current_network.nodes[v]['info'] = '+ {}'.format(v)
+            kind = 'source'
         elif current_network.out_degree(v) == 0:
-            current_network.nodes[v]['type'] = 'sink'
-            if 'flow' in current_network.nodes[v]:
-                current_network.nodes[v]['info'] = '- {}, {}'.format(v, current_network.nodes[v]['flow'])
-            elif 'min_flow' in current_network.nodes[v]:
-                current_network.nodes[v]['info'] = '- {}, {}/{}'.format(v, current_network.nodes[v]['min_flow'], current_network.nodes[v]['max_flow'])
-            else:
-                current_network.nodes[v]['info'] = '- {}'.format(v)
+            kind = 'sink'
         else:
-            current_network.nodes[v]['type'] = 'pass'
-            if 'flow' in current_network.nodes[v]:
-                current_network.nodes[v]['info'] = '{}, {}'.format(v, current_network.nodes[v]['flow'])
-            elif 'min_flow' in current_network.nodes[v]:
-                current_network.nodes[v]['info'] = '{}, {}/{}'.format(v, current_network.nodes[v]['min_flow'], current_network.nodes[v]['max_flow'])
+            kind = 'pass'
+        if 'flow' in attributes:
+            mode = 'flow'
+            args = (v, attributes['flow'])
+        elif 'min_flow' in attributes:
+            mode = 'min_flow'
+            args = (v, attributes['min_flow'], attributes['max_flow'])
+        else:
+            mode = None
+            args = (v,)
+
+        cached = _vertex_labels.get(v)
+        if cached is not None and cached[0] == kind and cached[1] == args:
+            label = cached[2]
+        else:
+            label = _LABEL_FMTS[kind, mode].format(*args)
+            _vertex_labels[v] = (kind, args, label)
+        attributes['type'] = kind
+        attributes['info'] = label
+
+def add_vertex(vertex_value):
+    """
+    Adds a vertex, parsing its optional flow (name/flow) or flow restrictions
+    (name/min/max). Returns an info message, empty when nothing's wrong.
+    """
+    # partition slices the value without allocating a list the way split
+    # does; a second partition covers the name/min/max form.
+    name, slash, rest = vertex_value.partition('/')
+    if name in current_network:
+        return 'Vertex {} is already on the network.'.format(name)
+    info = ''
+    if not slash:
+        current_network.add_node(name, type='source', info=f'+ {name}')
+    else:
+        flow_part, slash, bound_part = rest.partition('/')
+        if not slash:
+            flow = int(flow_part)
+            current_network.add_node(name, type='source', flow=flow, info=f'+ {name}, {flow}')
+        else:
+            min_f = int(flow_part)
+            max_f = int(bound_part.partition('/')[0])
+            if min_f >= 0 and min_f <= max_f:
+                current_network.add_node(name, type='source', min_flow=min_f, max_flow=max_f, info=f'+ {name}, {min_f}/{max_f}')
             else:
-                current_network.nodes[v]['info'] = '{}'.format(v)
+                info = 'Invalid restrictions for vertex {}.'.format(name)
+    if name in current_network:
+        place_vertex(name)
+        current_elements.append(node_element(name))
+    return info
+
+def add_edge(source, terminus, weight, restriction, cost):
+    """Adds or updates an edge. Returns an info message like add_vertex."""
+    # Probed once up front with the membership operator; every branch below
+    # reuses the locals instead of re-running the lookups.
+    has_source = source in current_network
+    has_terminus = terminus in current_network
+    if has_source and has_terminus and weight >= restriction and restriction >= 0 and weight >= 0:
+        is_new = not current_network.has_edge(source, terminus)
+        current_network.add_edge(source, terminus, weight=weight, restriction=restriction, flow=0, cost=cost, info=f'r:{restriction}, f:0, q:{weight}, c:{cost}')
+        update_vertices_info(current_network, source)
+        update_vertices_info(current_network, terminus)
+        if is_new:
+            current_elements.append(edge_element(source, terminus))
+        else:
+            # Re-adding an edge only changes its attributes.
+            for element in current_elements:
+                data = element['data']
+                if data.get('source') == source and data.get('target') == terminus:
+                    element['data'] = edge_element(source, terminus)['data']
+                    break
+        refresh_node_elements((source, terminus))
+        return ''
+    elif not has_source and has_terminus:
+        return 'Vertex {} is not on the network.'.format(source)
+    elif has_source and not has_terminus:
+        return 'Vertex {} is not on the network.'.format(terminus)
+    elif not has_source and not has_terminus:
+        return 'Vertices {} and {} are not on the network.'.format(source, terminus)
+    elif weight < restriction:
+        return "The capacity of the edge can't be less than the restriction."
+    elif restriction < 0:
+        return "The minimum restriction can't be negative."
+    return "The capacity of the edge can't be negative."
+
+def remove_vertex(rm_vertex):
+    """Removes a vertex and its incident edges."""
+    if rm_vertex not in current_network:
+        return 'Vertex {} is not on the network.'.format(rm_vertex)
+    # Only the neighbors of the removed vertex can change type or label, so
+    # there's no point relabeling the whole network.
+    affected = set(current_network.predecessors(rm_vertex)) \
+             | set(current_network.successors(rm_vertex))
+    current_network.remove_node(rm_vertex)
+    layout_positions.pop(rm_vertex, None)
+    for vertex in affected:
+        update_vertices_info(current_network, vertex)
+    # Dropping the vertex and its incident edges in a single pass.
+    current_elements[:] = [
+        element for element in current_elements
+        if element['data'].get('id') != rm_vertex
+        and element['data'].get('source') != rm_vertex
+        and element['data'].get('target') != rm_vertex
+    ]
+    refresh_node_elements(affected)
+    return ''
+
+def remove_edge(rm_source, rm_terminus):
+    """Removes an edge."""
+    has_source = rm_source in current_network
+    has_terminus = rm_terminus in current_network
+    if has_source and has_terminus and current_network.has_edge(rm_source, rm_terminus):
+        current_network.remove_edge(rm_source, rm_terminus)
+        update_vertices_info(current_network, rm_source)
+        update_vertices_info(current_network, rm_terminus)
+        current_elements[:] = [
+            element for element in current_elements
+            if not (element['data'].get('source') == rm_source
+                    and element['data'].get('target') == rm_terminus)
+        ]
+        refresh_node_elements((rm_source, rm_terminus))
+        return ''
+    elif not has_source and has_terminus:
+        return 'Vertex {} is not on the network.'.format(rm_source)
+    elif has_source and not has_terminus:
+        return 'Vertex {} is not on the network.'.format(rm_terminus)
+    elif not has_source and not has_terminus:
+        return 'Vertices {} and {} are not on the network.'.format(rm_source, rm_terminus)
+    return "There isn't an edge between vertices {} and {}.".format(rm_source, rm_terminus)
+
+def run_algorithm(algorithm, target_flow):
+    """Runs the chosen algorithm through the D library and swaps in its result."""
+    global current_network
+    global original_network
+    global file_id
+
+    file_path = file.save_graph(current_network, file_id)
+    original_network = current_network
+    if algorithm == 'ford' or algorithm == 'simplex':
+        sbp.run(["./lib/bin/network.out", file_path, str(file_id), algorithm, '0'])
+    else:
+        sbp.run(["./lib/bin/network.out", file_path, str(file_id), algorithm, str(target_flow)])
+
+    result, is_a_graph, info = file.load_network(file_id)
+    if is_a_graph:
+        current_network = result
+        update_vertices_info(current_network)
+        file_id += 1
+    else:
+        info = result
+    rebuild_elements()
+    return info
+
+def reset_network():
+    """Goes back to the network as it was before the last run."""
+    global current_network
+    global file_id
+
+    current_network = original_network
+    rebuild_elements()
+    if file_id > 1:
+        file_id -= 1
+    return ''
+
+# One handler per button, picked by a single dict lookup on the triggering
+# id. Each handler validates its own inputs and returns the info message.
+HANDLERS = {
+    'btn-vertex-network': lambda values: (
+        add_vertex(values['vertex'])
+        if values['vertex'] != "" else ''),
+    'btn-edge-network': lambda values: (
+        add_edge(values['source'], values['terminus'], values['weight'], values['restriction'], values['cost'])
+        if values['source'] != "" and values['terminus'] != "" and values['weight'] is not None
+        and values['restriction'] is not None and values['cost'] is not None else ''),
+    'btn-rm-vertex-network': lambda values: (
+        remove_vertex(values['rm_vertex'])
+        if values['rm_vertex'] != "" else ''),
+    'btn-rm-edge-network': lambda values: (
+        remove_edge(values['rm_source'], values['rm_terminus'])
+        if values['rm_source'] != "" and values['rm_terminus'] != "" else ''),
+    'btn-run-network': lambda values: (
+        run_algorithm(values['algorithm'], values['target_flow'])
+        if values['algorithm'] not in ('mincycle', 'minpaths')
+        or values['target_flow'] not in ('', ' ', None) else ''),
+    'btn-reset-network': lambda values: reset_network(),
+    'btn-empty-network': lambda values: empty_network() or '',
+    'btn-bulk-network': lambda values: (
+        add_bulk_edges(values['bulk_edges'])
+        if values['bulk_edges'] else ''),
+}
 
 #--- GUI
 
@@ -165,7 +460,14 @@ layout = html.Div(children=[
                     dbc.Button('Empty network', color='warning', id='btn-empty-network', className='mx-2'),
                     # dbc.Button('Load network', color='primary', id='btn-load-network', className='mx-2'),
                     # dbc.Button('Save network', color='primary', id='btn-save-network', className='mx-2')
-                ], justify='center', className='m-4')
+                ], justify='center', className='m-4'),
+                dbc.Row([
+                    dbc.Col([
+                        html.H5('Bulk edges:'),
+                        dbc.Textarea(id='bulk-edges-network', placeholder='a,b,10,0,2\nb,c,5,1,3', className='my-1'),
+                        dbc.Button('Add edges', color='primary', id='btn-bulk-network', className='my-2'),
+                    ])
+                ], justify='around', className='p-1')
             ], width=3),
             dbc.Col([
                 dbc.Row([
@@ -210,7 +512,7 @@ layout = html.Div(children=[
                 cyto.Cytoscape(
                     id='network',
                     layout={
-                        'name': 'cose'
+                        'name': 'preset'
                     },
                     style={
                         'width': '100%',
@@ -248,13 +550,14 @@ Updating the network every time a vertex or an edge are added/removed.
 """
 @app.callback(
     Output(component_id='network', component_property='elements'),
-    [Input(component_id='btn-vertex-network', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-edge-network', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-rm-vertex-network', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-rm-edge-network', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-run-network', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-reset-network', component_property='n_clicks_timestamp'),
-     Input(component_id='btn-empty-network', component_property='n_clicks_timestamp')],
+    [Input(component_id='btn-vertex-network', component_property='n_clicks'),
+     Input(component_id='btn-edge-network', component_property='n_clicks'),
+     Input(component_id='btn-rm-vertex-network', component_property='n_clicks'),
+     Input(component_id='btn-rm-edge-network', component_property='n_clicks'),
+     Input(component_id='btn-run-network', component_property='n_clicks'),
+     Input(component_id='btn-reset-network', component_property='n_clicks'),
+     Input(component_id='btn-empty-network', component_property='n_clicks'),
+     Input(component_id='btn-bulk-network', component_property='n_clicks')],
     [State(component_id='vertex-network', component_property='value'),
      State(component_id='source-network', component_property='value'),
      State(component_id='terminus-network', component_property='value'),
@@ -266,109 +569,35 @@ Updating the network every time a vertex or an edge are added/removed.
      State(component_id='weight-network', component_property='value'),
      State(component_id='target-flow', component_property='value'),
      State('drop-algo-network', 'value'),
-     State('network', 'elements')]
+     State('bulk-edges-network', 'value')]
 )
-def update_network(btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty, vertex_value, source, terminus,
-    restriction, cost, rm_vertex, rm_source, rm_terminus, weight, target_flow, algorithm, elements):
-    global current_network
-    global file_id
-    global original_network
+def update_network(btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty, btn_bulk, vertex_value, source, terminus,
+    restriction, cost, rm_vertex, rm_source, rm_terminus, weight, target_flow, algorithm, bulk_edges):
     global info
 
     info = ''
-    buttons = np.array([btn if btn is not None else 0 for btn in (btn_vertex, btn_edge, btn_rm_v, btn_rm_e, btn_run, btn_reset, btn_empty)])
-    btn_pressed = np.argmax(buttons)
-
-    if btn_vertex is not None and btn_pressed == 0 and vertex_value != "":
-        input = vertex_value.split('/')
-        if not current_network.has_node(input[0]):
-            if len(input) == 1:
-                current_network.add_node(input[0], type='source', info='+ {}'.format(input[0]))
-            elif len(input) == 2:
-                flow = int(input[1])
-                current_network.add_node(input[0], type='source', flow=flow, info='+ {}, {}'.format(input[0], flow))
-            elif len(input) >= 3:
-                min_f = int(input[1])
-                max_f = int(input[2])
-                if min_f >= 0 and min_f <= max_f:
-                    current_network.add_node(input[0], type='source', min_flow=min_f, max_flow=max_f, info='+ {}, {}/{}'.format(input[0], min_f, max_f))
-                else:
-                    info = 'Invalid restrictions for vertex {}.'.format(input[0])
-            elements = nx.readwrite.json_graph.cytoscape_data(current_network)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        else:
-            info = 'Vertex {} is already on the network.'.format(input[0])
-    elif btn_edge is not None and btn_pressed == 1 and source != "" and terminus != "" and weight is not None and restriction is not None and cost is not None:
-        if current_network.has_node(source) and current_network.has_node(terminus) and weight >= restriction and restriction >= 0 and weight >= 0:
-            current_network.add_edge(source, terminus, weight=weight, restriction=restriction, flow=0, cost=cost, info='r:{}, f:{}, q:{}, c:{}'.format(restriction, 0, weight, cost))
-            update_vertices_info(current_network, source)
-            update_vertices_info(current_network, terminus)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_network)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        elif not current_network.has_node(source) and current_network.has_node(terminus):
-            info = 'Vertex {} is not on the network.'.format(source)
-        elif current_network.has_node(source) and not current_network.has_node(terminus):
-            info = 'Vertex {} is not on the network.'.format(terminus)
-        elif not current_network.has_node(source) and not current_network.has_node(terminus):
-            info = 'Vertices {} and {} are not on the network.'.format(source, terminus)
-        elif weight < restriction:
-            info = "The capacity of the edge can't be less than the restriction."
-        elif restriction < 0:
-            info = "The minimum restriction can't be negative."
-        else:
-            info = "The capacity of the edge can't be negative."
-    elif btn_rm_v is not None and btn_pressed == 2 and rm_vertex != "":
-        if current_network.has_node(rm_vertex):
-            current_network.remove_node(rm_vertex)
-            update_vertices_info(current_network)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_network)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        else:
-            info = 'Vertex {} is not on the network.'.format(rm_vertex)
-    elif btn_rm_e is not None and btn_pressed == 3 and rm_source != "" and rm_terminus != "":
-        if current_network.has_node(rm_source) and current_network.has_node(rm_terminus) and current_network.has_edge(rm_source, rm_terminus):
-            current_network.remove_edge(rm_source, rm_terminus)
-            update_vertices_info(current_network, rm_source)
-            update_vertices_info(current_network, rm_terminus)
-            elements = nx.readwrite.json_graph.cytoscape_data(current_network)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-        elif not current_network.has_node(rm_source) and current_network.has_node(rm_terminus):
-            info = 'Vertex {} is not on the network.'.format(rm_source)
-        elif current_network.has_node(rm_source) and not current_network.has_node(rm_terminus):
-            info = 'Vertex {} is not on the network.'.format(rm_terminus)
-        elif not current_network.has_node(rm_source) and not current_network.has_node(rm_terminus):
-            info = 'Vertices {} and {} are not on the network.'.format(rm_source, rm_terminus)
-        else:
-            info = "There isn't an edge between vertices {} and {}.".format(rm_source, rm_terminus)
-    elif btn_run is not None and btn_pressed == 4:
-        if ((algorithm == 'mincycle' or algorithm == 'minpaths') and target_flow != '' and target_flow != ' ' and target_flow is not None) or algorithm == 'ford' or algorithm == 'simplex':
-            file_path = file.save_graph(current_network, file_id)
-            original_network = current_network
-            if algorithm == 'ford' or algorithm == 'simplex':
-                sbp.run(["./lib/bin/network.out", file_path, str(file_id), algorithm, '0'])
-            else:
-                sbp.run(["./lib/bin/network.out", file_path, str(file_id), algorithm, str(target_flow)])
+    # The component that fired the callback comes straight from Dash's
+    # context: no need to juggle click timestamps to find the pressed button.
+    context = dash.callback_context
+    trigger = context.triggered[0]['prop_id'].split('.')[0]
 
-            result, is_a_graph, info = file.load_network(file_id)
-            if is_a_graph:
-                current_network = result
-                update_vertices_info(current_network)
-                file_id += 1
-            else:
-                info = result
-            elements = nx.readwrite.json_graph.cytoscape_data(current_network)
-            elements = elements['elements']['nodes'] + elements['elements']['edges']
-    elif btn_reset is not None and btn_pressed == 5:
-        current_network = original_network
-        elements = nx.readwrite.json_graph.cytoscape_data(current_network)
-        elements = elements['elements']['nodes'] + elements['elements']['edges']
-        if file_id > 1:
-            file_id -= 1
-    elif btn_empty is not None and btn_pressed == 6:
-        current_network.clear()
-        elements = nx.readwrite.json_graph.cytoscape_data(current_network)
-        elements = elements['elements']['nodes'] + elements['elements']['edges']
-    return elements
+    handler = HANDLERS.get(trigger)
+    if handler is not None:
+        info = handler({
+            'vertex': vertex_value,
+            'source': source,
+            'terminus': terminus,
+            'rm_vertex': rm_vertex,
+            'rm_source': rm_source,
+            'rm_terminus': rm_terminus,
+            'weight': weight,
+            'restriction': restriction,
+            'cost': cost,
+            'target_flow': target_flow,
+            'algorithm': algorithm,
+            'bulk_edges': bulk_edges,
+        })
+    return current_elements
 
 """
 Displaying additional information,
@@ -385,80 +614,60 @@ def update_additional_info(network):
 Changing the information displayed at the top of the page every time the network
 is changed.
 """
+# Formatted info labels keyed by (nodes, edges): the counts repeat a lot
+# across callback fires, so most updates become a dict hit.
+_info_labels = {}
+
 @app.callback(
     Output(component_id='info-network', component_property='children'),
     [Input(component_id='network', component_property='elements')]
 )
 def update_network_info(network):
-    return "The network has {} node(s) and {} edge(s)".format(current_network.number_of_nodes(), current_network.number_of_edges())
+    key = (current_network.number_of_nodes(), current_network.number_of_edges())
+    label = _info_labels.get(key)
+    if label is None:
+        if len(_info_labels) > 128:
+            _info_labels.clear()
+        label = "The network has {} node(s) and {} edge(s)".format(*key)
+        _info_labels[key] = label
+    return label
 
 """
-Resetting the Inputs every time their assigned button gets pressed.
+Resetting the Inputs every time their assigned button gets pressed. These run
+entirely in the browser through the shared functions in assets/reset.js, so a
+click doesn't cost a server round-trip per input.
 """
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='blank'),
     Output(component_id='vertex-network', component_property='value'),
     [Input(component_id='btn-vertex-network', component_property='n_clicks')]
 )
-def reset_vertex_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='source-network', component_property='value'),
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='network_edge'),
+    [Output(component_id='source-network', component_property='value'),
+     Output(component_id='terminus-network', component_property='value'),
+     Output(component_id='weight-network', component_property='value'),
+     Output(component_id='restriction-network', component_property='value'),
+     Output(component_id='cost-network', component_property='value')],
     [Input(component_id='btn-edge-network', component_property='n_clicks')]
 )
-def reset_source_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='terminus-network', component_property='value'),
-    [Input(component_id='btn-edge-network', component_property='n_clicks')]
-)
-def reset_terminus_input(n_clicks):
-    return ""
-
-@app.callback(
-    Output(component_id='weight-network', component_property='value'),
-    [Input(component_id='btn-edge-network', component_property='n_clicks')]
-)
-def reset_weight_input(n_clicks):
-    return 1
-
-@app.callback(
-    Output(component_id='restriction-network', component_property='value'),
-    [Input(component_id='btn-edge-network', component_property='n_clicks')]
-)
-def reset_weight_input(n_clicks):
-    return 0
-
-@app.callback(
-    Output(component_id='cost-network', component_property='value'),
-    [Input(component_id='btn-edge-network', component_property='n_clicks')]
-)
-def reset_weight_input(n_clicks):
-    return 0
-
-@app.callback(
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='blank'),
     Output(component_id='rm-vertex-network', component_property='value'),
     [Input(component_id='btn-rm-vertex-network', component_property='n_clicks')]
 )
-def reset_rm_vertex_input(n_clicks):
-    return ""
 
-@app.callback(
-    Output(component_id='rm-source-network', component_property='value'),
-    [Input(component_id='btn-rm-edge-network', component_property='n_clicks')]
-)
-def reset_rm_source_input(n_clicks):
-    return ""
-
-@app.callback(
-    Output(component_id='rm-terminus-network', component_property='value'),
+app.clientside_callback(
+    ClientsideFunction(namespace='reset', function_name='pair'),
+    [Output(component_id='rm-source-network', component_property='value'),
+     Output(component_id='rm-terminus-network', component_property='value')],
     [Input(component_id='btn-rm-edge-network', component_property='n_clicks')]
 )
-def reset_rm_terminus_input(n_clicks):
-    return ""
 
 #--- End of callbacks
 
 if __name__ == '__main__':
-    app.run_server(debug=True)
+    import os
+    app.run_server(debug=os.environ.get('NAGUI_DEBUG') == '1')
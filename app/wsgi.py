@@ -0,0 +1,10 @@
+"""
+Entry point for production WSGI servers, e.g.:
+
+    gunicorn -w 4 -k gthread --threads 8 wsgi:application
+"""
+
+from nagui import app
+import index # noqa: F401. Registers the layout and callbacks.
+
+application = app.server